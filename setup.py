@@ -1,7 +1,14 @@
 #!/usr/bin/env python
 
+import os
 from distutils.core import setup
 
+# the segment decoder can optionally be compiled with mypyc
+ext_modules = []
+if os.environ.get('DABMOT_MYPYC'):
+    from mypyc.build import mypycify
+    ext_modules = mypycify(['src/mot/segment.py'])
+
 setup(name='dabmot',
       version='1.1',
       description='DAB MOT object assembly and decoding',
@@ -10,8 +17,9 @@ setup(name='dabmot',
       url='https://github.com/OpenDigitalRadio/python-dabmot',
       packages=['mot'],
       package_dir = {'' : 'src'},
+      ext_modules = ext_modules,
       keywords = ['dab', 'mot', 'radio'],
-      install_requires = ['jdcal'],
-      test_requires = ['unittest2'],
+      install_requires = ['bitarray', 'python-dabmsc', 'python-dateutil'],
+      extras_require = {'test': ['unittest2']},
       tests = ['test']
      )
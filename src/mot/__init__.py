@@ -1,26 +1,44 @@
 from bitarray import bitarray
-from msc import int_to_bitarray, bitarray_to_hex, generate_transport_id
-from datetime import timedelta, datetime, time
+from msc import bitarray_to_hex, generate_transport_id
+from datetime import timedelta, datetime, date, time
 from dateutil.tz import tzutc
-from jdcal import gcal2jd
+from bisect import bisect_right
+from functools import lru_cache
+import io
 import logging
+import struct
 import types
 
 logger = logging.getLogger('mot')
 
+# proleptic Gregorian ordinal of MJD 0 (1858-11-17)
+_MJD_EPOCH = 678576
+
+# single byte parameter prefixes, indexed by (PLI << 6) | ParamId
+_PREFIX = tuple(bytes((i,)) for i in range(256))
+
+# fixed layout blocks, with bit fields masked out of the unpacked words
+_DIRECTORY_HEADER = struct.Struct('>IHHBHH') # 13 bytes
+_DIRECTORY_ENTRY = struct.Struct('>HIHB') # TransportId then the 7 byte core header
+_CORE_HEADER = struct.Struct('>IHB') # 7 bytes
+
 class ContentType:
     '''Content type and subtypes as per ETSI TS 101 756 v1.3.1 (2006-02)'''
     
+    __slots__ = ('type', 'subtype', '_hash')
+    
     def __init__(self, type, subtype):
         self.type = type
         self.subtype = subtype
+        self._hash = (type << 9) | subtype
 
     def __eq__(self, other):
+        if self is other: return True
         if not isinstance(other, ContentType): return False
         return self.type == other.type and self.subtype == other.subtype
 
     def __hash__(self):
-        return hash('%d%d' % (self.type, self.subtype))
+        return self._hash
         
     def __str__(self):
         return '[%d:%d]' % (self.type, self.subtype)
@@ -71,27 +89,29 @@ class MotObject:
     def __init__(self, name, body=None, type=ContentType.GENERAL_OBJECT_TRANSFER, transport_id=None):
         self._parameters = {}
         if isinstance(name, str): self.add_parameter(ContentName(name))
-        else: self.add_parameter(name)
+        else: 
+            self.add_parameter(name)
+            name = name.name
         self._body = body
         self._type = type
-        self._transport_id = transport_id if transport_id is not None else generate_transport_id(name)
+        self._transport_id = transport_id if transport_id is not None else generate_transport_id(name) # cached by name
         
     def add_parameter(self, param):
         if not isinstance(param, HeaderParameter): 
             raise ValueError('parameter {param} of type {type} is not a valid header parameter'.format(param=param, type=param.__class__.__name__))
-        self._parameters[param.__class__.__name__] = param
+        self._parameters[param.__class__] = param
         
     def get_parameters(self):
         return list(self._parameters.values())
     
     def get_parameter(self, clazz):
-        return self._parameters.get(clazz.__name__)
+        return self._parameters.get(clazz)
     
     def has_parameter(self, clazz):
         return self.get_parameter(clazz) is not None
 
     def remove_parameter(self, clazz):
-        self._parameters.pop(clazz.__name__)
+        self._parameters.pop(clazz)
     
     def get_transport_id(self):
         return self._transport_id
@@ -111,153 +131,176 @@ class MotObject:
     def __str__(self):
         return "{name} [{id}]".format(name=self.get_name(), id=self.get_transport_id())
     
+@lru_cache(maxsize=4096) # schedules repeat the same timepoints across many objects
 def encode_absolute_time(timepoint):
     
     if timepoint is None: # NOW
-        bits = bitarray(32)
-        bits.setall(False)
-        return bits
+        return b'\x00\x00\x00\x00'
         
-    bits = bitarray()
-    
     # adjust for non-UTC times
     if timepoint.tzinfo is not None and timepoint.tzinfo != tzutc():
         timepoint = timepoint.astimezone(tzutc())
     
-    # b0: ValidityFlag: 1 for MJD and UTC are valid
-    bits += bitarray('1');
-    
     # b1-17: MJD
-    mjd = int((gcal2jd(timepoint.year,timepoint.month,timepoint.day))[1])
-    bits += int_to_bitarray(mjd, 17)
-    
-    # b18-19: RFU
-    bits += int_to_bitarray(0, 2)
+    mjd = (timepoint.toordinal() - _MJD_EPOCH) & 0x1FFFF
 
+    # b0: ValidityFlag=1, b1-17: MJD, b18-19: RFU
     # b20: UTC Flag
     # b21: UTC - 11 or 27 bits depending on the form
     if timepoint.second > 0:
-        bits += bitarray('1')
-        bits += int_to_bitarray(timepoint.hour, 5)
-        bits += int_to_bitarray(timepoint.minute, 6)
-        bits += int_to_bitarray(timepoint.second, 6)
-        bits += int_to_bitarray(timepoint.microsecond/1000, 10)
+        v = (1 << 47) | (mjd << 30) | (1 << 27) | (timepoint.hour << 22) | (timepoint.minute << 16) | \
+            (timepoint.second << 10) | (timepoint.microsecond // 1000)
+        return v.to_bytes(6, 'big')
     else:
-        bits += bitarray('0')
-        bits += int_to_bitarray(timepoint.hour, 5)
-        bits += int_to_bitarray(timepoint.minute, 6)
-
-    return bits
+        v = (1 << 31) | (mjd << 14) | (timepoint.hour << 6) | timepoint.minute
+        return v.to_bytes(4, 'big')
 
 def mjd_to_date(mjd):
-    return datetime.fromtimestamp((mjd - 40587) * 86400)
+    return date.fromordinal(mjd + _MJD_EPOCH)
 
-def decode_absolute_time(bits):
+def decode_absolute_time(data):
     
-    if not bits.any(): return None # NOW
+    if not any(data): return None # NOW
     
-    mjd = int(bits[1:18].to01(), 2)
-    date = mjd_to_date(mjd)
-    timepoint = datetime.combine(date, time())
-
-    if bits[20]:
-        timepoint.replace(hour=int(bits[21:26].to01(), 2))
-        timepoint.replace(minute=int(bits[26:32].to01(), 2))
-        timepoint.replace(second=int(bits[32:38].to01(), 2))
-        timepoint.replace(microsecond=int(bits[38:48].to01(), 2) * 1000)
+    w = int.from_bytes(data, 'big')
+    size = len(data) * 8
+    
+    # b1-17: MJD
+    mjd = (w >> (size - 18)) & 0x1FFFF
+    
+    # b20: UTC Flag
+    # b21: UTC - 11 or 27 bits depending on the form
+    if (w >> (size - 21)) & 1:
+        fields = ((w >> 22) & 0x1F, (w >> 16) & 0x3F, (w >> 10) & 0x3F, w & 0x3FF)
     else:
-        timepoint.replace(hour=int(bits[21:26].to01(), 2))
-        timepoint.replace(minute=int(bits[26:32].to01(), 2))    
-    return timepoint
+        fields = ((w >> 6) & 0x1F, w & 0x3F, 0, 0)
+    hours, minutes, seconds, milliseconds = fields
+    if hours > 23 or minutes > 59 or seconds > 59 or milliseconds > 999:
+        raise ValueError('absolute time is out of range: %02d:%02d:%02d.%03d' % fields)
+    t = time(hours, minutes, seconds, milliseconds * 1000)
+    return datetime.combine(mjd_to_date(mjd), t, tzinfo=tzutc())
     
 def encode_relative_time(offset):
     
-    bits = bitarray()
+    if offset < timedelta(0): raise ValueError('relative expiration cannot be negative: %s' % offset)
+    seconds = int(offset.total_seconds())
     if offset < timedelta(minutes=127):
-        minutes = offset.seconds / 60
-        two_minutes = minutes / 2 # round to multiples of 2 minutes
-        bits += int_to_bitarray(0, 2) # (0-1): Granularity=0
-        bits += int_to_bitarray(two_minutes, 6) # (2-7): Interval
+        granularity = 0
+        interval = seconds // 120 # round to multiples of 2 minutes
     elif offset < timedelta(minutes=1891):
-        minutes = offset.seconds / 60
-        halfhours = minutes / 30 # round to multiples of 30 minutes
-        bits += int_to_bitarray(1, 2) # (0-1): Granularity=1
-        bits += int_to_bitarray(halfhours, 6) # (2-7): Interval
+        granularity = 1
+        interval = seconds // 1800 # round to multiples of 30 minutes
     elif offset < timedelta(hours=127):
-        hours = offset.seconds / (60 * 60) + offset.days * 24
-        twohours = hours / 2
-        bits += int_to_bitarray(2, 2) # (0-1): Granularity=2
-        bits += int_to_bitarray(twohours, 6) # (2-7): Interval
+        granularity = 2
+        interval = seconds // 7200 # round to multiples of 2 hours
     elif offset < timedelta(hours=64*24):
-        days = offset.days
-        bits += int_to_bitarray(2, 3) # (0-1): Granularity=3
-        bits += int_to_bitarray(6, days) # (2-7): Interval
+        granularity = 3
+        interval = offset.days
     else:
         raise ValueError('relative expiration is greater than the maximum allowed: %s > 63 days' % offset)
     
-    return bits
+    return _PREFIX[(granularity << 6) | interval] # (0-1): Granularity, (2-7): Interval
+
+# interval units for each granularity
+_RELATIVE_TIME_UNITS = (timedelta(minutes=2), timedelta(minutes=30), timedelta(hours=2), timedelta(days=1))
+
+def decode_relative_time(data):
+    return _RELATIVE_TIME_UNITS[data[0] >> 6] * (data[0] & 0x3F) # (0-1): Granularity, (2-7): Interval
 
-def decode_relative_time(bits):
-    raise ValueError('decoding of relative time parameter not done yet')
+class _EncodedValue:
+    '''Parameter attribute that encodes its value once, on assignment, into the
+       owner's _encoded slot so it is reused for every object it is attached to'''
 
-class UnknownHeaderParameter:
+    def __init__(self, encode):
+        self.encode = encode
+
+    def __set_name__(self, owner, name):
+        self.slot = '_' + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None: return self
+        return getattr(instance, self.slot)
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+        instance._encoded = self.encode(value)
+
+class UnknownHeaderParameter(Exception):
 
     def __init__(self, id, data):
+        Exception.__init__(self, id, data)
         self.id = id
         self.data = data
 
     def __str__(self):
-        return 'Unknown header parameter 0x%02x with size %d bytes' % (self.id, self.data.length()/8)
+        return 'Unknown header parameter 0x%02x with size %d bytes' % (self.id, len(self.data))
 
-class HeaderParameter:
+class Parameter:
+    '''Common encoding for header and directory parameters'''
     
-    decoders = {}
+    __slots__ = ('id',)
     
     def __init__(self, id):
         self.id = id
     
-    def encode(self):
+    def _parts(self):
         
         # encode the data first
         data = self.encode_data()
-        data_length = len(data.tobytes())
-        
-        bits = bitarray()
+        if isinstance(data, bitarray): data = data.tobytes()
+        data_length = len(data)
         
         # create the correct parameter preamble
         if data_length == 0:
-            bits += int_to_bitarray(0, 2) # (0-1): PLI=0
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
+            preamble = _PREFIX[self.id] # (0-1): PLI=0, (2-7): ParamId
         elif data_length == 1:
-            bits += int_to_bitarray(1, 2) # (0-1): PLI=1
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
+            preamble = _PREFIX[0x40 | self.id] # (0-1): PLI=1, (2-7): ParamId
         elif data_length == 4:
-            bits += int_to_bitarray(2, 2) # (0-1): PLI=2
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId\
-            if data_length < 4: data += bitarray((4 - data_length) * 8)
+            preamble = _PREFIX[0x80 | self.id] # (0-1): PLI=2, (2-7): ParamId
         elif data_length <= 127:
-            bits += int_to_bitarray(3, 2) # (0-1): PLI=3
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
-            bits += bitarray('0') # (8): Ext=0
-            bits += int_to_bitarray(data_length, 7) # (9-15): DataFieldLength in bytes     
-        elif data_length <= 32770:
-            bits += int_to_bitarray(3, 2) # (0-1): PLI=3
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
-            bits += bitarray('1') # (8): Ext=1
-            bits += int_to_bitarray(data_length, 15) # (9-23): DataFieldLength in bytes 
-        
-        bits += data
+            preamble = _PREFIX[0xC0 | self.id] + _PREFIX[data_length] # (0-1): PLI=3, (2-7): ParamId, (8): Ext=0, (9-15): DataFieldLength in bytes
+        elif data_length <= 32767:
+            preamble = struct.pack('>BH', 0xC0 | self.id, 0x8000 | data_length) # (0-1): PLI=3, (2-7): ParamId, (8): Ext=1, (9-23): DataFieldLength in bytes
+        else:
+            raise ValueError('parameter data is greater than the maximum allowed: %d > 32767 bytes' % data_length)
         
+        return preamble, data
+    
+    def tobytes(self):
+        preamble, data = self._parts()
+        return preamble + data
+    
+    def write_into(self, buf):
+        '''Append the encoded parameter to a bytearray, without creating
+           an intermediate bytes object for it'''
+        preamble, data = self._parts()
+        buf += preamble
+        buf += data
+    
+    def encode(self):
+        bits = bitarray()
+        bits.frombytes(self.tobytes())
         return bits
     
+class HeaderParameter(Parameter):
+    
+    __slots__ = ()
+    
+    decoders = [None] * 64 # indexed by ParamId
+    
     def encode_data(self):
         raise NotImplementedError()
     
     @staticmethod
     def from_bits(bits, i=0):
-                
-        PLI = int(bits[i:i+2].to01(), 2)
-        param_id = int(bits[i+2:i+8].to01(), 2)
+        return HeaderParameter.frombytes(bits.tobytes(), i // 8)
+    
+    @staticmethod
+    def frombytes(data, i=0):
+        
+        data = memoryview(data)
+        PLI = data[i] >> 6
+        param_id = data[i] & 0x3F
         
         if PLI == 0:
             data_start = 1
@@ -269,25 +312,25 @@ class HeaderParameter:
             data_start = 1
             data_length = 4
         elif PLI == 3:
-            if bits[i+8]:
+            if data[i+1] & 0x80:
                 data_start = 3 
-                data_length = int(bits[i+9:i+24].to01(), 2)
+                data_length = ((data[i+1] & 0x7F) << 8) | data[i+2]
             else:
                 data_start = 2 
-                data_length = int(bits[i+9:i+16].to01(), 2)
-        data = bits[i + (data_start * 8) : i + (data_start * 8) + (data_length * 8)]
-        if data_length != data.length()/8: raise ValueError('data length %d is different from signalled data length %d' % (len(data), data_length))
+                data_length = data[i+1] & 0x7F
+        param_data = data[i + data_start : i + data_start + data_length]
+        if data_length != len(param_data): raise ValueError('data length %d is different from signalled data length %d' % (len(param_data), data_length))
         
         # check we know how to decode this
-        if param_id not in HeaderParameter.decoders:
-            raise UnknownHeaderParameter(param_id, bits[i : i + (data_start * 8) + (data_length * 8)])
         decoder = HeaderParameter.decoders[param_id]
+        if decoder is None:
+            raise UnknownHeaderParameter(param_id, data[i : i + data_start + data_length])
         try:
-            param = decoder(data)
+            param = decoder(param_data)
             logger.debug('decoded parameter %s from param id %d with decoder %s', param, param_id, decoder)
         except:
             logger.error('error decoding parameter from content: header=%s | data=%s | using decoder: %s', 
-                         bitarray_to_hex(bits[i:i+(data_start*8)]), bitarray_to_hex(data), decoder)
+                         data[i:i+data_start].hex(), param_data.hex(), decoder)
             raise
         
         return param, data_start + data_length         
@@ -302,24 +345,20 @@ class ContentName(HeaderParameter):
     ISO_LATIN1 = 4
     ISO_IEC_10646 = 15
     
+    __slots__ = ('name', 'charset')
+    
     def __init__(self, name, charset=ISO_LATIN1):
         HeaderParameter.__init__(self, 12)
         self.name = name
         self.charset = charset
         
     def encode_data(self):
-        bits = bitarray()
-        bits += int_to_bitarray(self.charset, 4) # (0-3): Character set indicator
-        bits += int_to_bitarray(0, 4) # (4-7): RFA
-        tmp = bitarray()
-        tmp.frombytes(self.name.encode())
-        bits += tmp
-        return bits
+        return _encode_content_name(self.name, self.charset)
     
     @staticmethod
     def decode_data(data):
-        charset = int(data[0:4].to01(), 2)
-        return ContentName(data[8:].tostring(), charset) # TODO encode to the specific character set
+        charset = data[0] >> 4
+        return ContentName(bytes(data[1:]).decode(ContentName.CODECS[charset], errors='replace'), charset)
     
     def __str__(self):
         return self.name
@@ -327,33 +366,50 @@ class ContentName(HeaderParameter):
     def __repr__(self):
         return "<ContentName: %s>" % str(self)
     
+# Python codec for each character set indicator. The EBU Latin sets have no 
+# codec of their own and are treated as ISO Latin 1
+ContentName.CODECS = ['latin_1'] * 16
+ContentName.CODECS[ContentName.ISO_LATIN2] = 'iso8859_2'
+ContentName.CODECS[ContentName.ISO_IEC_10646] = 'utf_8'
+
+@lru_cache(maxsize=2048) # the same names are signalled over and over in a carousel
+def _encode_content_name(name, charset):
+    codec = ContentName.CODECS[charset & 0x0F]
+    try:
+        data = name.encode(codec)
+    except UnicodeEncodeError:
+        raise ValueError('content name %r cannot be encoded in character set %d (%s) - use ContentName.ISO_IEC_10646' % (name, charset, codec))
+    return _PREFIX[(charset & 0x0F) << 4] + data # (0-3): Character set indicator, (4-7): RFA
+    
         
 class MimeType(HeaderParameter):
     '''Content MIME type'''
     
+    __slots__ = ('mimetype',)
+    
     def __init__(self, mimetype):
         HeaderParameter.__init__(self, 16)
         self.mimetype = mimetype
         
     def encode_data(self):
-        bits = bitarray()
-        bits.frombytes(self.mimetype.encode())
-        return bits
+        return self.mimetype.encode()
     
     @staticmethod
     def decode_data(data):
-        return MimeType(data.tostring())
+        return MimeType(bytes(data).decode())
     
 class ExpirationParameter(HeaderParameter):
     
+    __slots__ = ()
+    
     @staticmethod
     def decode_data(data):
-        if len(data)/8 == 1:
+        if len(data) == 1:
             return RelativeExpiration(decode_relative_time(data))
-        elif len(data)/8 in [4, 6]:
+        elif len(data) in [4, 6]:
             return AbsoluteExpiration(decode_absolute_time(data))
         else:
-            raise ValueError('unknown data length for expiration: %d bytes' % (len(data)/8))    
+            raise ValueError('unknown data length for expiration: %d bytes' % len(data))    
     
 class RelativeExpiration(ExpirationParameter):
     '''Indicates the maximum time span an object is considered
@@ -367,35 +423,45 @@ class RelativeExpiration(ExpirationParameter):
        half hours - half an hour to 31.5 hours
        two hours - 2 hours to 5 days 6 hours'''
     
+    __slots__ = ('_offset', '_encoded')
+    
     def __init__(self, offset):
         HeaderParameter.__init__(self, 4)
         self.offset = offset
         
+    offset = _EncodedValue(encode_relative_time)
+        
     def encode_data(self):
-        return encode_relative_time(self.offset)
+        return self._encoded
             
 class AbsoluteExpiration(ExpirationParameter):
     '''The value, as coded in UTC specifies the absolute time when
        the object expires. The object will not be valid anymore and 
        therefore shall no longer be presented.'''
  
+    __slots__ = ('_timepoint', '_encoded')
+    
     def __init__(self, timepoint):
         HeaderParameter.__init__(self, 4)
         self.timepoint = timepoint
         
+    timepoint = _EncodedValue(encode_absolute_time)
+        
     def encode_data(self):
-        return encode_absolute_time(self.timepoint)
+        return self._encoded
            
 class Compression(HeaderParameter):
     '''Used to indicate that an object has been compressed and
        which compression algorithm has been applied to the data.'''
+    
+    __slots__ = ('type',)
           
     def __init__(self, type):
         HeaderParameter.__init__(self, 17)
         self.type = type
         
     def encode_data(self):
-        return int_to_bitarray(self.type, 8)
+        return _PREFIX[self.type]
     
     def __eq__(self, that):
         if not isinstance(that, Compression): return False
@@ -403,7 +469,7 @@ class Compression(HeaderParameter):
     
     @staticmethod
     def decode_data(data):
-        return Compression(int(data.to01(), 2))
+        return Compression(data[0])
     
 Compression_RESERVED = Compression(0)
 Compression.GZIP = Compression(1)    
@@ -416,58 +482,26 @@ class Priority(HeaderParameter):
 
        The possible values range from 0 = highest to 255 = lowest'''
     
+    __slots__ = ('priority',)
+    
     def __init__(self, priority):
         assert priority >=0 and priority <= 255
         HeaderParameter.__init__(self, 10)
         self.priority = priority
         
     def encode_data(self):
-        return int_to_bitarray(self.priority, 8)
+        return _PREFIX[self.priority]
     
     @staticmethod
     def decode_data(data):
-        return Priority(int(data.to01(), 2))
+        return Priority(data[0])
         
-class DirectoryParameter:
+class DirectoryParameter(Parameter):
     
-    def __init__(self, id):
-        self.id = id
+    __slots__ = ()
     
-    def encode(self):
-        
-        # encode the data first
-        data = self.encode_data()
-        data_length = len(data.tobytes())
-        
-        bits = bitarray()
-        
-        # create the correct parameter preamble
-        if data_length == 0:
-            bits += int_to_bitarray(0, 2) # (0-1): PLI=0
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
-        elif data_length == 1:
-            bits += int_to_bitarray(1, 2) # (0-1): PLI=1
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
-        elif data_length <= 4:
-            bits += int_to_bitarray(2, 2) # (0-1): PLI=2
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
-        elif data_length <= 127:
-            bits += int_to_bitarray(3, 2) # (0-1): PLI=3
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
-            bits += bitarray('0') # (8): Ext=0
-            bits += int_to_bitarray(data_length, 7) # (9-15): DataFieldLength in bytes     
-        elif data_length <= 32770:
-            bits += int_to_bitarray(3, 2) # (0-1): PLI=3
-            bits += int_to_bitarray(self.id, 6) # (2-7): ParamId
-            bits += bitarray('1') # (8): Ext=1
-            bits += int_to_bitarray(data_length, 15) # (9-23): DataFieldLength in bytes 
-        
-        bits += data
-        
-        return bits
-
     def encode_data(self):
-        return bitarray() 
+        return b''
     
     
 class DefaultPermitOutdatedVersions(DirectoryParameter):
@@ -482,14 +516,14 @@ class DefaultPermitOutdatedVersions(DirectoryParameter):
        If neither parameter is provided, then the MOT decoder shall not 
        present any outdated version of this object.'''
     
+    __slots__ = ('permit',)
+    
     def __init__(self, permit):
         DirectoryParameter.__init__(self, 1)
         self.permit = permit
         
     def encode_data(self):
-        bits = bitarray()
-        bits.frombytes(b'\x01' if self.permit else b'\x00')
-        return bits
+        return b'\x01' if self.permit else b'\x00'
 
 class DefaultRelativeExpiration(DirectoryParameter):
     '''Used to indicate a default value that specifies how
@@ -513,12 +547,16 @@ class DefaultRelativeExpiration(DirectoryParameter):
        half hours - half an hour to 31.5 hours
        two hours - 2 hours to 5 days 6 hours'''
        
+    __slots__ = ('_offset', '_encoded')
+    
     def __init__(self, offset):
         DirectoryParameter.__init__(self, 9)
         self.offset = offset
         
+    offset = _EncodedValue(encode_relative_time)
+        
     def encode_data(self):
-        return encode_relative_time(self.offset)
+        return self._encoded
     
 class DefaultAbsoluteExpiration(DirectoryParameter):
     '''Used to indicate a default value that specifies how
@@ -535,18 +573,24 @@ class DefaultAbsoluteExpiration(DirectoryParameter):
        the object expires. The object will not be valid anymore and 
        therefore shall no longer be presented.'''
        
+    __slots__ = ('_timepoint', '_encoded')
+    
     def __init__(self, timepoint):
         DirectoryParameter.__init__(self, 9)
         self.timepoint = timepoint
         
+    timepoint = _EncodedValue(encode_absolute_time)
+        
     def encode_data(self):
-        return encode_absolute_time(self.timepoint)
+        return self._encoded
     
 class SortedHeaderInformation(DirectoryParameter):
     '''Used to signal that the headers within the MOT directory
        are sorted in ascending order of the ContentName
        parameter within every header information block.'''
     
+    __slots__ = ()
+    
     def __init__(self):
         DirectoryParameter.__init__(self, 0)
         
@@ -560,38 +604,15 @@ HeaderParameter.decoders[10] = Priority.decode_data
 def is_complete(t, cache):
     
     logger.debug('checking completeness for transport id %d', t)
-    
-    def check_type_complete(type, transport_id=None):
-        if transport_id: 
-            datagroups = [x for x in cache[t] if x.get_type() == type]
-            logger.debug('found %d datagroups for transport id %d type %d', len(datagroups), transport_id, type)
-        else:
-            datagroups = []
-            for k in list(cache.keys()):
-                if cache[k][0].get_type() == type: 
-                    datagroups = cache[k]
-                    break 
-            logger.debug('found %d datagroups for type %d', len(datagroups), type)
-        if not len(datagroups): return False
-        previous = None
-        if datagroups[0].segment_index != 0: 
-            return False
-        if not datagroups[-1].last: # last datagroup is not signalled last
-            return False
-        for d in datagroups:
-            if previous and d.segment_index != previous.segment_index + 1: 
-                return False
-            previous = d
-        return True
             
     # first check complete bodies
-    if not check_type_complete(4, t):
+    if not cache.is_type_complete(t, 4):
         logger.debug('bodies for transport id %d are not complete', t) 
         return False
     
     # then check for a complete header or a complete directory
-    if not check_type_complete(3, t):
-        if not check_type_complete(6):
+    if not cache.is_type_complete(t, 3):
+        if cache.directory_id is None:
             logger.debug('no complete header and no directory available for object with transport id %s', t)
             return False
         
@@ -601,50 +622,56 @@ def decode_directory_object(data):
     
     logger.debug('decoding directory object from %d bytes of data', len(data))
     
-    bits = bitarray()
-    bits.frombytes(data)
+    data = memoryview(data)
     
     # parse directory header
-    total_size = int(bits[2:32].to01(), 2)
+    total_size, number_of_objects, period_high, period_low, segment_size, directory_extension_length = _DIRECTORY_HEADER.unpack_from(data)
+    total_size &= 0x3FFFFFFF
     #if len(data) != total_size: raise ValueError('directory data is different from that signalled: %d != %d bytes', len(data), total_size)
-    number_of_objects = int(bits[32:48].to01(), 2)
     logger.debug('directory is signalling that %d objects exist in the carousel', number_of_objects)
-    carousel_period = int(bits[48:72].to01(), 2)
+    carousel_period = (period_high << 8) | period_low
     if carousel_period > 0: logger.debug('carousel has a maximum rotation period of %ds', carousel_period/10)
     else: logger.debug('carousel period is undefined')
-    segment_size = int(bits[75:88].to01(), 2)
+    segment_size &= 0x1FFF
     logger.debug('segment size is %d bytes', segment_size)
-    directory_extension_length = int(bits[88:104].to01(), 2)
     logger.debug('directory extension length is %d bytes', directory_extension_length)
 
-    i = 104 + (directory_extension_length * 8) # skip over the directory extenion for now
+    p = 13 + directory_extension_length # skip over the directory extenion for now
     
     logger.debug('now parsing header entries')
+    debug = logger.isEnabledFor(logging.DEBUG) # once, rather than for every entry
     headers = {}
-    while i < bits.length():
-        transport_id = int(bits[i:i+16].to01(), 2)
-        logger.debug('parsing header with transport id %d', transport_id)
-        i += 16
+    length = len(data)
+    for _ in range(number_of_objects):
+        if p + _DIRECTORY_ENTRY.size > length:
+            logger.warning('directory data ends after %d of %d signalled entries', len(headers), number_of_objects)
+            break
+        transport_id, word, half, byte = _DIRECTORY_ENTRY.unpack_from(data, p)
+        if debug: logger.debug('parsing header with transport id %d', transport_id)
+        p += 2
         
         # core header
-        body_size = int(bits[i:i+28].to01(), 2)
-        header_size = int(bits[i+28:i+41].to01(), 2)
-        content_type = ContentType(int(bits[i+41:i+47].to01(), 2), int(bits[i+47:i+56].to01(), 2))
-        logger.debug('core header indicates: body=%d bytes, header=%d bytes, content type=%s', body_size, header_size, content_type)
-        end = i + (header_size * 8)
-        i += 56
+        body_size = word >> 4
+        header_size = ((word & 0x0F) << 9) | (half >> 7)
+        content_type = ContentType((half >> 1) & 0x3F, ((half & 0x01) << 8) | byte)
+        if debug: logger.debug('core header indicates: body=%d bytes, header=%d bytes, content type=%s', body_size, header_size, content_type)
+        end = p + header_size
+        p += 7
         
         parameters = []
-        while i < end:
+        while p < end:
             try:
-                parameter, size = HeaderParameter.from_bits(bits, i)
+                parameter, size = HeaderParameter.frombytes(data, p)
                 parameters.append(parameter)
-                i += (size * 8)
-                logger.debug('%d bytes of header left to parse for this object', (end - i) / 8)
+                p += size
+                if debug: logger.debug('%d bytes of header left to parse for this object', end - p)
+            except UnknownHeaderParameter as e:
+                logger.warning('unknown header parameter (0x%02x) at position %d', e.id, p)
+                p += len(e.data)
             except: 
-                logger.exception('error parsing parameter %d bytes before the end - skipping rest of parameters', (end - i) / 8)
-                i = end
+                logger.exception('error parsing parameter %d bytes before the end - skipping rest of parameters', end - p)
                 break
+        p = end # the next entry always follows on from the signalled header size
         headers[transport_id] = (content_type, parameters) # tuple for now
     return headers
     
@@ -653,47 +680,49 @@ def compile_object(transport_id, cache):
     logger.debug('compiling object with transport id %d', transport_id)
     
     params = []
-    header = ''
     datagroups = cache[transport_id]
 
     # compile any headers for this transport ID from header objects
-    for datagroup in [x for x in datagroups if x.get_type() == 3]:
-        logger.debug('compiling header from datagroup %s', datagroup)
-        header += datagroup.get_data() # HAVE TO BE CAREFUL HERE TO ACCOUNT FOR THE SEGMENT HEADER
+    header = b''.join([x.get_data() for x in datagroups if x.get_type() == 3]) # HAVE TO BE CAREFUL HERE TO ACCOUNT FOR THE SEGMENT HEADER
+    if len(header):
+        logger.debug('compiling header from %d bytes of header datagroups', len(header))
         
         # parse parameters
-        bits = bitarray()
-        bits.frombytes(header)
+        data = memoryview(header)
         try:
-            type = int(bits[41:47].to01(), 2)
-            subtype = int(bits[47:56].to01(), 2)
+            word, half, byte = _CORE_HEADER.unpack_from(data)
+            end = min(((word & 0x0F) << 9) | (half >> 7), len(data)) # signalled header size
+            type = (half >> 1) & 0x3F
+            subtype = ((half & 0x01) << 8) | byte
             content_type = ContentType(type, subtype)
             logger.debug('parsed content type: %s', content_type)
-            i = 56
+            i = 7
             logger.debug('parsing header parameters')
-            while i < len(bits):
+            debug = logger.isEnabledFor(logging.DEBUG)
+            while i < end:
                 try:
-                    param, size = HeaderParameter.from_bits(bits, i)
-                    logger.debug('parsed header parameter: %s of size %d', param, size)
+                    param, size = HeaderParameter.frombytes(data, i)
+                    if debug: logger.debug('parsed header parameter: %s of size %d', param, size)
                     params.append(param)
-                except (UnknownHeaderParameter, e):
-                    logger.warning('unknown header parameter (0x%02x) at position %d', e.id, (i/8))
-                    if not e.data.length(): raise ValueError('unknown header parameter with no size - cannot continue')
-                    size = e.data.length() / 8
-                i += (size * 8)
+                except UnknownHeaderParameter as e:
+                    logger.warning('unknown header parameter (0x%02x) at position %d', e.id, i)
+                    if not len(e.data): raise ValueError('unknown header parameter with no size - cannot continue')
+                    size = len(e.data)
+                i += size
         except:
-            logger.error('error parsing header: \n%s' % bitarray_to_hex(bits))
+            logger.error('error parsing header: \n%s' % data.hex())
             raise
         
     # or check for a directory object and get the parameters from that
     if not len(header):
         logger.debug('compiling header from directory object')
         if not cache.directory:
-            directory = ''            
+            directory = []
             for k in list(cache.keys()):
                 if cache[k][0].get_type() == 6: 
                     for datagroup in cache[k]:
-                        directory += datagroup.get_data()
+                        directory.append(datagroup.get_data())
+            directory = b''.join(directory)
             dir_object = decode_directory_object(directory)
             cache.directory = dir_object
         
@@ -703,9 +732,7 @@ def compile_object(transport_id, cache):
             raise
         
     # compile body
-    body = ''
-    for datagroup in [x for x in datagroups if x.get_type() == 4]:
-        body += datagroup.get_data()
+    body = b''.join([x.get_data() for x in datagroups if x.get_type() == 4])
               
     name = None
     for param in params:
@@ -724,6 +751,41 @@ def compile_object(transport_id, cache):
 class Cache(dict):
     def __init__(self):
         self.directory = None
+        self.segments = {} # transport id -> type -> segment indices received
+        self.last = {} # transport id -> type -> segment index signalled as last
+        self.order = {} # transport id -> sorted (type, segment index) of the datagroups held
+        self.directory_id = None # transport id of a complete directory, once one is held
+        
+    def record(self, datagroup):
+        '''Add a datagroup under its transport id, keeping the datagroups ordered by
+           type and segment index. Returns False if the datagroup is already held'''
+        transport_id = datagroup.get_transport_id()
+        type = datagroup.get_type()
+        received = self.segments.setdefault(transport_id, {}).setdefault(type, set())
+        if datagroup.segment_index in received: return False
+        received.add(datagroup.segment_index)
+        if datagroup.last: self.last.setdefault(transport_id, {})[type] = datagroup.segment_index
+        
+        key = (type, datagroup.segment_index)
+        keys = self.order.setdefault(transport_id, [])
+        position = bisect_right(keys, key)
+        keys.insert(position, key)
+        self.setdefault(transport_id, []).insert(position, datagroup)
+        if type == 6 and self.is_type_complete(transport_id, 6): self.directory_id = transport_id
+        return True
+        
+    def is_type_complete(self, transport_id, type):
+        last = self.last.get(transport_id, {}).get(type)
+        if last is None: return False
+        received = self.segments[transport_id][type]
+        return len(received) == last + 1 and max(received) == last # exactly 0..last
+    
+    def pop(self, transport_id, *args):
+        self.segments.pop(transport_id, None)
+        self.last.pop(transport_id, None)
+        self.order.pop(transport_id, None)
+        if transport_id == self.directory_id: self.directory_id = None
+        return dict.pop(self, transport_id, *args)
         
 def decode_objects(data, error_callback=None):
     """Decode a series of datagroups and yield the results.
@@ -738,19 +800,18 @@ def decode_objects(data, error_callback=None):
     
     if isinstance(data, bitarray):
         raise NotImplementedError('no support for decoding of objects from a bitarray')
-    elif isinstance(data, file):
+    elif isinstance(data, io.IOBase):
         raise NotImplementedError('no support for decoding of objects from a file object')
     elif isinstance(data, list) or isinstance(data, types.GeneratorType):
         logger.debug('decoding objects from list/generator: %s', data)
         for d in data:
-            logger.debug('got datagroup: %s', d)
-            items = cache.get(d.get_transport_id(), [])
-            if d not in items: items.append(d)
-            items = sorted(items, key=lambda x: (x.get_type(), x.segment_index))
-            cache[d.get_transport_id()] = items
-
-            # examine cache for complete objects
-            for t in list(cache.keys()):
+            if not cache.record(d): continue # already held
+
+            # examine cache for complete objects - a new datagroup can only complete its own
+            # object, unless it is part of a directory which could complete any of them
+            if d.get_type() == 6: candidates = list(cache.keys())
+            else: candidates = [d.get_transport_id()]
+            for t in candidates:
                 if is_complete(t, cache):
                     logger.debug('object with transport id %d is complete', t)
                     object = compile_object(t, cache)
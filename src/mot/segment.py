@@ -0,0 +1,198 @@
+"""Human-readable dumps of MOT header, directory and body segments.
+
+Each decode function appends lines of output to the given list, so the
+caller decides where the dump goes.
+"""
+
+from __future__ import annotations
+
+class BitReader:
+    """reads big-endian bit fields in sequence from a bytes-like buffer"""
+
+    __slots__ = ('mv', 'off')
+
+    def __init__(self, data: bytes | memoryview, off: int = 0) -> None:
+        self.mv = memoryview(data)
+        self.off = off
+
+    def u(self, n: int) -> int:
+        """read an unsigned integer of n bits and advance past it"""
+        b = self.off
+        self.off += n
+        return (int.from_bytes(self.mv[b>>3:(b+n+7)>>3], 'big') >> ((-(b+n)) & 7)) & ((1 << n) - 1)
+
+    def u8(self) -> int:
+        """read a whole byte from a byte-aligned position and advance past it"""
+        v = self.mv[self.off >> 3]
+        self.off += 8
+        return v
+
+    def skip(self, n: int) -> None:
+        self.off += n
+
+    def bytes(self, n: int) -> memoryview:
+        """take n whole bytes from a byte-aligned position and advance past them"""
+        b0 = self.off >> 3
+        self.off += n * 8
+        return self.mv[b0:b0+n]
+
+def decode_pli0(br: BitReader, out: list[str]) -> None:
+    pass
+
+def decode_pli1(br: BitReader, out: list[str]) -> None:
+    out.append('data length: 8\ndata: %s' % br.bytes(1).hex())
+
+def decode_pli2(br: BitReader, out: list[str]) -> None:
+    out.append('data length: 32\ndata: %s' % br.bytes(4).hex())
+
+def decode_pli3(br: BitReader, out: list[str]) -> None:
+    # Ext flag then a 7 or 15 bit DataFieldLength
+    n = br.u8()
+    if n & 0x80:
+        n = ((n & 0x7F) << 8) | br.u8()
+    data = br.bytes(n)
+    out.append('data length: %d\ndata: %s\ndata: %s' % (n, data.hex(), str(data, 'latin-1')))
+
+PARAMETER_TEMPLATE = """Parameter %d
+============
+PLI: %d
+ParamId: %d %s"""
+
+OBJECT_TEMPLATE = """=================
+Object %d
+=================
+transport id: %d
+Header Core
+===========
+body size: %d
+header size: %d
+contenttype: %d
+contentsubtype: %d
+"""
+
+# parameter data decoders, indexed by PLI
+PLI_DECODERS = (decode_pli0, decode_pli1, decode_pli2, decode_pli3)
+
+def decode_parameters(br: BitReader, out: list[str], end: int) -> None:
+    end = min(end, len(br.mv) * 8)
+    param_index = 1
+    # stop once there isn't room left for even a parameter's first byte
+    while br.off + 8 <= end:
+        # PLI and ParamId share the first byte of every parameter
+        head = br.u8()
+        pli = head >> 6
+        param_id = head & 0x3F
+        out.append(PARAMETER_TEMPLATE % (param_index, pli, param_id, format(param_id, '06b')))
+        if pli == 3 and (br.off + 8 > end or (br.mv[br.off >> 3] & 0x80 and br.off + 16 > end)):
+            out.append('DataFieldLength runs past the end of the header')
+            break
+        PLI_DECODERS[pli](br, out)
+        out.append('')
+        param_index += 1
+
+def decode_body_segment(raw: bytes | memoryview, out: list[str]) -> int:
+    """dump a body segment, returning the byte offset where decoding stopped"""
+    br = BitReader(raw)
+    out.append('Body Segment')
+    out.append('============')
+    segment_header = br.u(16)
+    out.append('repetition: %d' % (segment_header >> 13))
+    out.append('size: %d' % (segment_header & 0x1FFF))
+    out.append('')
+
+    return br.off >> 3
+
+def parse_directory_entries(br: BitReader, num_objects: int) -> tuple[list[int], ...]:
+    """walk num_objects directory entries from the reader's position, returning
+       columns of their transport ids, body sizes, header sizes, content types,
+       content subtypes and the bit offsets their parameters start and end at"""
+    transport_ids = []
+    body_sizes = []
+    header_sizes = []
+    content_types = []
+    content_subtypes = []
+    parameter_starts = []
+    parameter_ends = []
+    for i in range(num_objects):
+        # transport id and header core are a fixed 72 bits, so read them in one load
+        start = br.off
+        entry = br.u(72)
+        header_size = (entry >> 15) & 0x1FFF
+        transport_ids.append(entry >> 56)
+        body_sizes.append((entry >> 28) & 0xFFFFFFF)
+        header_sizes.append(header_size)
+        content_types.append((entry >> 9) & 0x3F)
+        content_subtypes.append(entry & 0x1FF)
+        parameter_starts.append(br.off)
+        br.off = start + 16 + header_size*8
+        parameter_ends.append(br.off)
+    return (transport_ids, body_sizes, header_sizes, content_types, content_subtypes,
+            parameter_starts, parameter_ends)
+
+def decode_directory_segment(raw: bytes | memoryview, out: list[str]) -> int:
+    """dump a directory segment, including the header of each object it lists,
+       returning the byte offset where decoding stopped"""
+    br = BitReader(raw)
+    out.append('Directory Segment')
+    out.append('==============')
+    segment_header = br.u(16)
+    out.append('repetition: %d' % (segment_header >> 13))
+    out.append('size: %d' % (segment_header & 0x1FFF))
+    out.append('')
+
+    out.append('Directory Header')
+    out.append('================')
+    br.skip(1)
+    out.append('directory size: %d' % br.u(31))
+    num_objects = br.u(16)
+    out.append('number of objects: %d' % num_objects)
+    out.append('carousel period: %d' % br.u(24))
+    br.skip(3)
+    out.append('segment size: %d' % br.u(13))
+    directory_extension_length = br.u(16)
+    out.append('directory extension length %d' % directory_extension_length)
+    out.append('')
+    
+    decode_parameters(br, out, br.off + directory_extension_length*8)
+
+    # first pass: walk the entries, collecting each field into its own column
+    (transport_ids, body_sizes, header_sizes, content_types, content_subtypes,
+     parameter_starts, parameter_ends) = parse_directory_entries(br, num_objects)
+    end = br.off
+
+    # second pass: emit the objects, decoding their parameters as we go
+    for i in range(num_objects):
+        out.append(OBJECT_TEMPLATE % (i+1, transport_ids[i], body_sizes[i], header_sizes[i],
+                                      content_types[i], content_subtypes[i]))
+
+        br.off = parameter_starts[i]
+        decode_parameters(br, out, parameter_ends[i])
+
+    return end >> 3
+
+
+def decode_header_segment(raw: bytes | memoryview, out: list[str]) -> int:
+    """dump a header segment, returning the byte offset where decoding stopped"""
+    br = BitReader(raw)
+    # now decode
+    out.append('Header Segment')
+    out.append('=======')
+    segment_header = br.u(16)
+    out.append('repetition: %d' % (segment_header >> 13))
+    out.append('size: %d' % (segment_header & 0x1FFF))
+    out.append('')
+
+    out.append('Header Core')
+    out.append('===========')
+    start = br.off
+    out.append('body size: %d' % br.u(28))
+    header_size = br.u(13)
+    out.append('header size: %d' % header_size)
+    out.append('contenttype: %d' % br.u(6))
+    out.append('contentsubtype: %d' % br.u(9))
+    out.append('')
+
+    end = start + header_size*8
+    decode_parameters(br, out, end)
+
+    return end >> 3
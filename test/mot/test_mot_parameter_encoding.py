@@ -1,65 +1,104 @@
 import unittest2
-from bitarray import bitarray
-from bitarray.util import ba2hex
-from mot import ContentName, MimeType, AbsoluteExpiration, RelativeExpiration, Compression, Priority, DefaultPermitOutdatedVersions, bitarray_to_hex
+from mot import ContentName, MimeType, AbsoluteExpiration, RelativeExpiration, Compression, Priority, DefaultPermitOutdatedVersions
+from mot import encode_absolute_time, decode_absolute_time, encode_relative_time, decode_relative_time
 from datetime import datetime, timedelta
+from dateutil.tz import tzutc
 
 class ContentNameTest(unittest2.TestCase):
     
     def test_contentname_latin1(self):
         name = ContentName('TEST')
 
-        tmp = bitarray()
-        tmp.frombytes(b'\xCC\x05\x40\x54\x45\x53\x54')
-        assert name.encode() == tmp
+        assert name.tobytes() == b'\xCC\x05\x40\x54\x45\x53\x54'
         
     def test_contentname_utf(self):
         name = ContentName('TEST', charset=ContentName.ISO_IEC_10646)
 
-        tmp = bitarray()
-        tmp.frombytes(b'\xCC\x05\xF0\x54\x45\x53\x54')
-        assert name.encode() == tmp
+        assert name.tobytes() == b'\xCC\x05\xF0\x54\x45\x53\x54'
+        
+    def test_contentname_latin1_accented(self):
+        name = ContentName('CAF\xc9')
+
+        assert name.tobytes() == b'\xCC\x05\x40\x43\x41\x46\xC9'
+        assert ContentName.decode_data(name.encode_data()).name == 'CAF\xc9'
+        
+    def test_contentname_not_latin1(self):
+        with self.assertRaises(ValueError):
+            ContentName('\u65e5.jpg').tobytes()
+        
+        name = ContentName('\u65e5.jpg', charset=ContentName.ISO_IEC_10646)
+        assert name.tobytes() == b'\xCC\x08\xF0\xE6\x97\xA5.jpg'
+        
+    def test_contentname_invalid_utf(self):
+        name = ContentName.decode_data(b'\xF0\xFFa.jpg')
+        
+        assert name.name == '\ufffda.jpg'
+        assert name.charset == ContentName.ISO_IEC_10646
         
 class MimeTypeTest(unittest2.TestCase):
     
     def test_mimetype(self):
         mimetype = MimeType("image/png")
         
-        tmp = bitarray()
-        tmp.frombytes(b'\xD0\x09\x69\x6D\x61\x67\x65\x2F\x70\x6E\x67')
-        assert mimetype.encode() == tmp
+        assert mimetype.tobytes() == b'\xD0\x09\x69\x6D\x61\x67\x65\x2F\x70\x6E\x67'
+        
+    def test_maximum_length(self):
+        mimetype = MimeType('x' * 32767)
+        
+        assert mimetype.tobytes()[:3] == b'\xD0\xFF\xFF'
+        with self.assertRaises(ValueError):
+            MimeType('x' * 32768).tobytes()
         
 class ExpirationTest(unittest2.TestCase):
     
     def test_expire_in_5_minutes(self):
         expiration = RelativeExpiration(timedelta(minutes=5))
 
-        tmp = bitarray()
-        tmp.frombytes(b'\x44\x02')
-        assert expiration.encode() == tmp
+        assert expiration.tobytes() == b'\x44\x02'
+        
+    def test_decode_relative(self):
+        assert decode_relative_time(encode_relative_time(timedelta(minutes=5))) == timedelta(minutes=4)
+        assert decode_relative_time(encode_relative_time(timedelta(hours=20))) == timedelta(hours=20)
+        assert decode_relative_time(encode_relative_time(timedelta(hours=100))) == timedelta(hours=100)
+        assert decode_relative_time(encode_relative_time(timedelta(days=63))) == timedelta(days=63)
+        
+    def test_negative_relative(self):
+        with self.assertRaises(ValueError):
+            encode_relative_time(timedelta(seconds=-1))
         
     def test_expire_at_set_date_shortform(self):
         expiration = AbsoluteExpiration(datetime(2010, 8, 11, 12, 34, 0 ,0))
 
-        tmp = bitarray()
-        tmp.frombytes(b'\x84\xB6\x1E\xC3\x22')     
-        assert expiration.encode() == tmp
+        assert expiration.tobytes() == b'\x84\xB6\x1E\xC3\x22'
         
     def test_expire_at_set_date_longform(self):
         expiration = AbsoluteExpiration(datetime(2010, 8, 11, 12, 34, 11, 678000))
 
-        tmp = bitarray()
-        tmp.frombytes(b'\xC4\x06\xB6\x1E\xCB\x22\x2E\xA6')
-        assert expiration.encode() == tmp
+        assert expiration.tobytes() == b'\xC4\x06\xB6\x1E\xCB\x22\x2E\xA6'
+        
+    def test_decode_set_date(self):
+        shortform = datetime(2010, 8, 11, 12, 34, 0, 0, tzinfo=tzutc())
+        longform = datetime(2010, 8, 11, 12, 34, 11, 678000, tzinfo=tzutc())
+
+        assert decode_absolute_time(encode_absolute_time(shortform)) == shortform
+        assert decode_absolute_time(encode_absolute_time(longform)) == longform
+        assert decode_absolute_time(encode_absolute_time(None)) is None
+        
+    def test_decode_out_of_range_date(self):
+        longform = int.from_bytes(encode_absolute_time(datetime(2010, 8, 11, 12, 34, 11, 678000)), 'big')
+        shortform = int.from_bytes(encode_absolute_time(datetime(2010, 8, 11, 12, 34)), 'big')
+        
+        with self.assertRaises(ValueError): # 1010ms
+            decode_absolute_time(((longform & ~0x3FF) | 1010).to_bytes(6, 'big'))
+        with self.assertRaises(ValueError): # hour 24
+            decode_absolute_time(((shortform & ~0x7C0) | (24 << 6)).to_bytes(4, 'big'))
         
 class CompressionType(unittest2.TestCase):
     
     def test_gzip(self):
         param = Compression.GZIP
 
-        tmp = bitarray()
-        tmp.frombytes(b'\x51\x01')
-        assert param.encode() == tmp
+        assert param.tobytes() == b'\x51\x01'
 
         
 class PriorityTest(unittest2.TestCase):
@@ -67,21 +106,38 @@ class PriorityTest(unittest2.TestCase):
     def test_priority(self):
         param = Priority(4)
 
-        tmp = bitarray()
-        tmp.frombytes(b'\x4A\x04')
-        assert param.encode() == tmp
+        assert param.tobytes() == b'\x4A\x04'
+        
+class WriteIntoTest(unittest2.TestCase):
+    
+    def test_write_into(self):
+        params = [ContentName('TEST'), MimeType('image/png'), Priority(4), DefaultPermitOutdatedVersions(True)]
+        
+        buf = bytearray()
+        for param in params: param.write_into(buf)
+        assert bytes(buf) == b''.join([param.tobytes() for param in params])
         
 class DefaultPermitOutdatedVersionsTest(unittest2.TestCase):
     
     def test_permitted(self):
         param = DefaultPermitOutdatedVersions(True)
 
-        assert ba2hex(param.encode()) == '4101'
+        assert param.tobytes() == b'\x41\x01'
 
     def test_forbidden(self):
         param = DefaultPermitOutdatedVersions(False)
         
-        assert ba2hex(param.encode()) == '4100'
+        assert param.tobytes() == b'\x41\x00'
+
+
+class SlotsTest(unittest2.TestCase):
+    
+    def test_no_instance_dict(self):
+        params = [ContentName('TEST'), MimeType('image/png'), RelativeExpiration(timedelta(minutes=5)),
+                  AbsoluteExpiration(datetime(2010, 8, 11, 12, 34, 0, 0)), Compression.GZIP, Priority(4),
+                  DefaultPermitOutdatedVersions(True)]
+        for param in params:
+            assert not hasattr(param, '__dict__'), param.__class__.__name__
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+import unittest2
+import struct
+from mot import Cache, is_complete, decode_objects, decode_directory_object, ContentName, MimeType
+
+class Datagroup:
+    '''Minimal stand-in for an msc datagroup'''
+    
+    def __init__(self, transport_id, type, segment_index, last, data):
+        self.transport_id = transport_id
+        self.type = type
+        self.segment_index = segment_index
+        self.last = last
+        self.data = data
+        
+    def get_transport_id(self): return self.transport_id
+    
+    def get_type(self): return self.type
+    
+    def get_data(self): return self.data
+    
+def split(transport_id, type, data, size):
+    parts = [data[i:i+size] for i in range(0, len(data), size)]
+    return [Datagroup(transport_id, type, i, i == len(parts) - 1, part) for i, part in enumerate(parts)]
+
+def parameters(name):
+    return ContentName(name).tobytes() + MimeType('image/png').tobytes()
+
+def core_header(body_size, parameters):
+    header_size = 7 + len(parameters)
+    return struct.pack('>IHB', (body_size << 4) | (header_size >> 9), ((header_size & 0x1FF) << 7) | (2 << 1), 1) + parameters
+
+def directory(entries):
+    data = b''.join([struct.pack('>H', transport_id) + core_header(body_size, parameters(name)) for transport_id, name, body_size in entries])
+    return struct.pack('>IHHBHH', 13 + len(data), len(entries), 0, 0, 1024, 0) + data
+
+class CacheTest(unittest2.TestCase):
+    
+    def test_out_of_order(self):
+        cache = Cache()
+        for index in (2, 0, 1):
+            assert cache.record(Datagroup(1, 4, index, index == 2, b'%d' % index))
+        assert cache.is_type_complete(1, 4)
+        assert [x.segment_index for x in cache[1]] == [0, 1, 2]
+        
+    def test_duplicate(self):
+        cache = Cache()
+        assert cache.record(Datagroup(1, 4, 0, False, b'0'))
+        assert not cache.record(Datagroup(1, 4, 0, False, b'0'))
+        assert len(cache[1]) == 1
+        
+    def test_missing_first_segment(self):
+        cache = Cache()
+        cache.record(Datagroup(1, 4, 1, True, b'1'))
+        cache.record(Datagroup(1, 4, 2, False, b'2'))
+        assert not cache.is_type_complete(1, 4)
+        
+    def test_segment_beyond_last(self):
+        cache = Cache()
+        cache.record(Datagroup(1, 4, 0, True, b'0'))
+        cache.record(Datagroup(1, 4, 3, False, b'3'))
+        assert not cache.is_type_complete(1, 4)
+        
+    def test_is_complete_needs_header(self):
+        cache = Cache()
+        cache.record(Datagroup(1, 4, 0, True, b'body'))
+        assert not is_complete(1, cache)
+        cache.record(Datagroup(1, 3, 0, True, core_header(4, parameters('a'))))
+        assert is_complete(1, cache)
+        
+    def test_is_complete_with_directory(self):
+        cache = Cache()
+        cache.record(Datagroup(1, 4, 0, True, b'body'))
+        cache.record(Datagroup(1000, 6, 1, True, b'dir1'))
+        assert cache.directory_id is None
+        assert not is_complete(1, cache)
+        cache.record(Datagroup(1000, 6, 0, False, b'dir0'))
+        assert cache.directory_id == 1000
+        assert is_complete(1, cache)
+        
+class DecodeObjectsTest(unittest2.TestCase):
+    
+    def test_header_mode(self):
+        bodies = {1: bytes(range(50)), 2: bytes(range(100, 170))}
+        datagroups = []
+        for transport_id, body in bodies.items():
+            datagroups += split(transport_id, 3, core_header(len(body), parameters('object%d' % transport_id)), 8)
+            datagroups += split(transport_id, 4, body, 16)
+        
+        # out of order, with duplicates
+        datagroups = datagroups[::-1] + datagroups[:3]
+        objects = list(decode_objects(datagroups))
+        
+        assert sorted([x.get_transport_id() for x in objects]) == [1, 2]
+        for object in objects:
+            assert object.get_body() == bodies[object.get_transport_id()]
+            assert object.get_name() == 'object%d' % object.get_transport_id()
+            assert object.get_parameter(MimeType).mimetype == 'image/png'
+            
+    def test_directory_mode(self):
+        bodies = {1: bytes(range(50)), 2: bytes(range(100, 170))}
+        datagroups = split(1000, 6, directory([(x, 'object%d' % x, len(bodies[x])) for x in bodies]), 20)
+        for transport_id, body in bodies.items():
+            datagroups += split(transport_id, 4, body, 16)
+        
+        # bodies complete before the directory has arrived
+        objects = list(decode_objects(datagroups[::-1]))
+        
+        assert sorted([x.get_transport_id() for x in objects]) == [1, 2]
+        for object in objects:
+            assert object.get_body() == bodies[object.get_transport_id()]
+            assert object.get_name() == 'object%d' % object.get_transport_id()
+        
+class DirectoryObjectTest(unittest2.TestCase):
+    
+    def test_unknown_parameter(self):
+        # ParamId 5 has no decoder registered, the ContentName after it must still be parsed
+        entry = struct.pack('>H', 7) + core_header(3, b'\x45\x01' + ContentName('a').tobytes())
+        data = struct.pack('>IHHBHH', 13 + len(entry), 1, 0, 0, 1024, 0) + entry
+        
+        content_type, params = decode_directory_object(data)[7]
+        assert [str(x) for x in params] == ['a']
+        
+    def test_trailing_padding(self):
+        data = directory([(1, 'object1', 10), (2, 'object2', 20)])
+        
+        for padding in (b'\x00\x00', b'\x00' * 20):
+            headers = decode_directory_object(data + padding)
+            assert sorted(headers.keys()) == [1, 2]
+        
+    def test_truncated(self):
+        data = directory([(1, 'object1', 10), (2, 'object2', 20)])
+        
+        headers = decode_directory_object(data[:-len(parameters('object2')) - 4])
+        assert list(headers.keys()) == [1]
+        
+        
+if __name__ == "__main__":
+    unittest2.main()
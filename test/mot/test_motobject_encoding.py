@@ -1,8 +1,7 @@
 import unittest2
-from bitarray import bitarray
-from bitarray.util import ba2hex
-from mot import MotObject, ContentType, MimeType, AbsoluteExpiration
+from mot import MotObject, ContentType, MimeType, AbsoluteExpiration, HeaderParameter
 from datetime import datetime
+from dateutil.tz import tzutc
 
 class MotObjectEncodingTest(unittest2.TestCase):
     
@@ -14,15 +13,15 @@ class MotObjectEncodingTest(unittest2.TestCase):
     def test_simple_2(self):
 
         # create MOT object
-        object = MotObject("TestObject", "\x00" * 16, ContentType.IMAGE_JFIF)        
+        object = MotObject("TestObject", "\x00" * 16, ContentType.IMAGE_JFIF, transport_id=1)        
 
         # add additional parameter - mimetype and absolute expiration
         object.add_parameter(MimeType("image/jpg"))
         object.add_parameter(AbsoluteExpiration(datetime(2010, 8, 11, 12, 34, 11, 678000)))
         
-        tmp = bitarray()
-        tmp.frombytes(b'\x51\x01')
-        assert object.encode() == tmp
+        assert object.get_parameter(MimeType).mimetype == 'image/jpg'
+        expiration, size = HeaderParameter.frombytes(object.get_parameter(AbsoluteExpiration).tobytes())
+        assert expiration.timepoint == datetime(2010, 8, 11, 12, 34, 11, 678000, tzinfo=tzutc())
     
 
 if __name__ == "__main__":
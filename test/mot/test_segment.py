@@ -0,0 +1,92 @@
+import unittest2
+from mot.segment import BitReader, decode_header_segment, decode_directory_segment, decode_body_segment, parse_directory_entries
+
+def parameter(id, data):
+    if len(data) == 0: return bytes((id,))
+    if len(data) == 1: return bytes((0x40 | id,)) + data
+    if len(data) == 4: return bytes((0x80 | id,)) + data
+    if len(data) <= 127: return bytes((0xC0 | id, len(data))) + data
+    return bytes((0xC0 | id, 0x80 | (len(data) >> 8), len(data) & 0xFF)) + data
+
+def core(body_size, parameters, header_size=None):
+    if header_size is None: header_size = 7 + len(parameters)
+    return ((body_size << 28) | (header_size << 15) | (2 << 9) | 1).to_bytes(7, 'big') + parameters
+
+def segment(data, repetition=0):
+    return ((repetition << 13) | len(data)).to_bytes(2, 'big') + data
+
+class SegmentHeaderTest(unittest2.TestCase):
+
+    def test_body_segment(self):
+        out = []
+        assert decode_body_segment(segment(b'0123456789', 3), out) == 2
+        assert 'repetition: 3' in out
+        assert 'size: 10' in out
+
+class HeaderSegmentTest(unittest2.TestCase):
+
+    def test_parameters(self):
+        header = core(1234, parameter(12, b'\x40logo.png') + parameter(1, b'') + parameter(4, b'\x84\xb6\x1e\xc3') + parameter(5, b'x' * 300))
+        raw = segment(header, 1) + b'trailing'
+        out = []
+        assert decode_header_segment(raw, out) == 2 + len(header)
+        text = '\n'.join(out)
+        assert 'repetition: 1' in out
+        assert 'body size: 1234' in out
+        assert 'header size: %d' % len(header) in out
+        assert 'contenttype: 2' in out
+        assert 'contentsubtype: 1' in out
+        assert 'PLI: 3\nParamId: 12 001100' in text
+        assert 'data: @logo.png' in text
+        assert 'PLI: 0\nParamId: 1 000001' in text
+        assert 'data length: 32\ndata: 84b61ec3' in text
+        assert 'data length: 300' in text
+        assert 'Parameter 5' not in text
+
+    def test_truncated_length(self):
+        # PLI=3 with no room left in the header for its DataFieldLength
+        out = []
+        decode_header_segment(segment(core(0, b'\xC5')), out)
+        assert out[-1] == 'DataFieldLength runs past the end of the header'
+
+    def test_truncated_extended_length(self):
+        # Ext flag set but only the first byte of the 15 bit length fits
+        out = []
+        decode_header_segment(segment(core(0, b'\xC5\x81')), out)
+        assert out[-1] == 'DataFieldLength runs past the end of the header'
+
+class DirectorySegmentTest(unittest2.TestCase):
+
+    def setUp(self):
+        self.extension = parameter(1, b'\x01')
+        self.entries = b''.join(i.to_bytes(2, 'big') + core(100 + i, parameter(12, b'\x40obj%d' % i)) for i in range(3))
+        header = (13 + len(self.extension) + len(self.entries)).to_bytes(4, 'big') + (3).to_bytes(2, 'big') + \
+                 (50).to_bytes(3, 'big') + (1024).to_bytes(2, 'big') + len(self.extension).to_bytes(2, 'big')
+        self.directory = header + self.extension + self.entries
+
+    def test_entries(self):
+        br = BitReader(self.entries)
+        transport_ids, body_sizes, header_sizes, content_types, content_subtypes, starts, ends = parse_directory_entries(br, 3)
+        assert transport_ids == [0, 1, 2]
+        assert body_sizes == [100, 101, 102]
+        assert header_sizes == [14, 14, 14]
+        assert content_types == [2, 2, 2]
+        assert content_subtypes == [1, 1, 1]
+        assert starts == [72, 72 + 128, 72 + 256]
+        assert ends == [128, 256, 384]
+        assert br.off == len(self.entries) * 8
+
+    def test_directory_segment(self):
+        out = []
+        assert decode_directory_segment(segment(self.directory, 2) + b'trailing', out) == 2 + len(self.directory)
+        text = '\n'.join(out)
+        assert 'repetition: 2' in out
+        assert 'size: %d' % len(self.directory) in out
+        assert 'number of objects: 3' in out
+        assert 'carousel period: 50' in out
+        assert 'segment size: 1024' in out
+        assert 'directory extension length 2' in out
+        for i in range(3):
+            assert 'Object %d\n=================\ntransport id: %d\nHeader Core\n===========\nbody size: %d' % (i + 1, i, 100 + i) in text
+        # each object's parameters follow its own header core
+        assert text.index('data: @obj0') < text.index('Object 2') < text.index('data: @obj1') < text.index('Object 3') < text.index('data: @obj2')